@@ -0,0 +1,46 @@
+#     rce-comm/rce/comm/assembler.pxd
+#
+#     This file is part of the RoboEarth Cloud Engine framework.
+#
+#     This file was originally created for RoboEearth
+#     http://www.roboearth.org/
+#
+#     The research leading to these results has received funding from
+#     the European Union Seventh Framework Programme FP7/2007-2013 under
+#     grant agreement no248942 RoboEarth.
+#
+#     Copyright 2013 RoboEarth
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+#
+#     \author/s: Dominique Hunziker
+#
+#
+
+# Type declarations which are used when rce.comm.assembler is compiled with
+# Cython (see setup.py); the module itself stays valid pure Python code.
+#
+# The message dictionaries are deliberately left untyped, since a 'dict'
+# declaration makes Cython reject subclasses like OrderedDict, which the
+# pure Python module accepts.
+
+import cython
+
+
+@cython.locals(uriBinary=list, stack=list, keys=list, uris=list)
+cpdef tuple recursiveBinarySearch(multidict)
+
+
+@cython.locals(valueList=list, stack=list, keys=list, lst=list,
+               i=cython.Py_ssize_t)
+cpdef list _recursiveURISearch(multidict)
@@ -32,8 +32,10 @@
 
 # Python specific imports
 import json
-from datetime import datetime, timedelta
-from uuid import uuid4
+import os
+from collections import OrderedDict
+from itertools import count
+from time import time
 
 try:
     from cStringIO import StringIO, InputType, OutputType
@@ -55,11 +57,28 @@ from twisted.internet.task import LoopingCall
 from rce.comm.error import InvalidRequest
 
 
+# Random prefix and counter which are used to generate the 32 characters long
+# URIs for the binary messages
+_URI_PREFIX = os.urandom(12).encode('hex')
+_URI_COUNTER = count()
+
+
 class AssemblerError(Exception):
     """ Exception is raised when an error in the message assembler occurs.
     """
 
 
+def _generateURI():
+    """ Generate a new URI for a binary message. The URIs are unique for this
+        process as long as there are less than 2**32 binary messages in
+        flight.
+
+        @return:                New URI.
+        @rtype:                 str
+    """
+    return _URI_PREFIX + '%08x' % (next(_URI_COUNTER) & 0xffffffff)
+
+
 def recursiveBinarySearch(multidict):
     """ Search a JSON message for StringIO instances which should be replaced
         with a reference to a binary message. Returns a list of all binary
@@ -77,46 +96,91 @@ def recursiveBinarySearch(multidict):
         @rtype:                 ((str, StringIO), { str : ... })
     """
     uriBinary = []
-    keys = []
-
-    for k, v in multidict.iteritems():
-        if isinstance(v, dict):
-            uriBinaryPart, multidictPart = recursiveBinarySearch(v)
-            uriBinary += uriBinaryPart
-            multidict[k] = multidictPart
-        elif isinstance(v, (list, tuple)):
-            if v and _checkIsStringIO(v[0]):
-                for e in v:
-                    if not _checkIsStringIO(e):
-                        raise ValueError('Can not mix binary and string '
-                                         'message in an array.')
 
+    # The nested dictionaries are modified in place; therefore, they can be
+    # traversed using a stack instead of recursive calls
+    stack = [multidict]
+
+    while stack:
+        d = stack.pop()
+        keys = []
+
+        for k, v in d.iteritems():
+            if isinstance(v, dict):
+                stack.append(v)
+            elif isinstance(v, (list, tuple)):
+                if v and _checkIsStringIO(v[0]):
+                    for e in v:
+                        if not _checkIsStringIO(e):
+                            raise ValueError('Can not mix binary and string '
+                                             'message in an array.')
+
+                    keys.append(k)
+            elif _checkIsStringIO(v):
                 keys.append(k)
-        elif _checkIsStringIO(v):
-            keys.append(k)
 
-    for k in keys:
-        ele = multidict.pop(k)
+        for k in keys:
+            ele = d.pop(k)
 
-        if isinstance(ele, (list, tuple)):
-            uris = []
+            if isinstance(ele, (list, tuple)):
+                uris = []
 
-            for e in ele:
-                tmpURI = uuid4().hex
-                uris.append(tmpURI)
-                uriBinary.append((tmpURI, e))
+                for e in ele:
+                    tmpURI = _generateURI()
+                    uris.append(tmpURI)
+                    uriBinary.append((tmpURI, e))
 
-            ele = uris
-        else:
-            tmpURI = uuid4().hex
-            uriBinary.append((tmpURI, ele))
-            ele = tmpURI
+                ele = uris
+            else:
+                tmpURI = _generateURI()
+                uriBinary.append((tmpURI, ele))
+                ele = tmpURI
 
-        multidict['{0}*'.format(k)] = ele
+            d[k + '*'] = ele
 
     return uriBinary, multidict
 
 
+def _recursiveURISearch(multidict):
+    """ Search a received JSON message for references to binary messages,
+        i.e. keys ending with '*'. The references are replaced with
+        placeholders in the message.
+
+        @param multidict:       Received JSON message.
+        @type  multidict:       { str : ... }
+
+        @return:                List of tuples of the forms (uri, dict, key)
+                                or (uri, list, index)
+        @rtype:                 [ (str, dict, str) or (str, list, int) ]
+    """
+    valueList = []
+    stack = [multidict]
+
+    while stack:
+        d = stack.pop()
+        keys = []
+
+        for k, v in d.iteritems():
+            if isinstance(v, dict):
+                stack.append(v)
+            elif k[-1:] == '*':
+                keys.append(k)
+
+        for k in keys:
+            ele = d.pop(k)
+
+            if isinstance(ele, list):
+                lst = [None] * len(ele)
+                d[k[:-1]] = lst
+
+                for i, uri in enumerate(ele):
+                    valueList.append((uri, lst, i))
+            else:
+                valueList.append((ele, d, k[:-1]))
+
+    return valueList
+
+
 class _IncompleteMsg(object):
     """ Class which represents an incomplete class.
     """
@@ -140,8 +204,6 @@ class _IncompleteMsg(object):
         for uri, msgDict, key in uris:
             self._uris[uri] = (msgDict, key)
 
-        self._added = datetime.now()
-
     @property
     def msg(self):
         """ Get the represented message. """
@@ -150,11 +212,10 @@ class _IncompleteMsg(object):
 
         return self._msg
 
-    def older(self, timestamp):
-        """ Returns True if this incomplete message is older the the given
-            timestamp.
-        """
-        return self._added < timestamp
+    @property
+    def uris(self):
+        """ Get the URIs of the binaries which are still missing. """
+        return self._uris.keys()
 
     def addBinary(self, uri, binaryData):
         """ Add the binary data with the given uri.
@@ -168,7 +229,7 @@ class _IncompleteMsg(object):
             parent[key] = binaryData
 
             if self._uris:
-                self._added = datetime.now()
+                self._assembler.refreshIncompleteMessage(self)
             else:
                 self._assembler.forwardCompleteMessage(self)
 
@@ -194,11 +255,17 @@ class MessageAssembler(object):
         self._protocol = protocol
         self._timeout = timeout
 
-        # Set of _IncompleteMessage instances
-        self._incompleteMsgs = set()
+        # Dictionary with _IncompleteMessage instances as key and the
+        # timestamp of their last update as value; oldest first
+        self._incompleteMsgs = OrderedDict()
 
-        # Dictionary with binary UID as key and the binary as value
-        self._binaries = {}
+        # Dictionary with binary UID as key and the _IncompleteMessage
+        # instance waiting for the binary as value
+        self._uriIndex = {}
+
+        # Dictionary with binary UID as key and the binary as value; oldest
+        # first
+        self._binaries = OrderedDict()
 
         # Setup repeated calling of the clean up method
         self._cleaner = LoopingCall(self._cleanUp)
@@ -207,9 +274,17 @@ class MessageAssembler(object):
         """ Callback for rce.comm.assembler._IncompleteMsg to send a completed
             message to the correct handler.
         """
-        self._incompleteMsgs.remove(msgRepr)
+        del self._incompleteMsgs[msgRepr]
         self._protocol.processCompleteMessage(msgRepr.msg)
 
+    def refreshIncompleteMessage(self, msgRepr):
+        """ Callback for rce.comm.assembler._IncompleteMsg to refresh the
+            timestamp of a message, which has received part of its binaries,
+            and move it to the end of the queue.
+        """
+        del self._incompleteMsgs[msgRepr]
+        self._incompleteMsgs[msgRepr] = time()
+
     def _handleString(self, msg, uris):
         """ Try to process the received incomplete string message, i.e.
             assemble the message with the waiting binary data. Forward the
@@ -219,7 +294,7 @@ class MessageAssembler(object):
             @param msg:     Received string message.
             @type  msg:     str
 
-            @param uris:    Return value of self._recursiveURISearch
+            @param uris:    Return value of _recursiveURISearch
             @type  uris:    [ (str, dict, str) or (str, list, int) ]
         """
         missing = []
@@ -234,7 +309,11 @@ class MessageAssembler(object):
                 missing.append(ref)
 
         if missing:
-            self._incompleteMsgs.add(_IncompleteMsg(self, msg, missing))
+            incompleteMsg = _IncompleteMsg(self, msg, missing)
+            self._incompleteMsgs[incompleteMsg] = time()
+
+            for uri, _, _ in missing:
+                self._uriIndex[uri] = incompleteMsg
         else:
             self._protocol.processCompleteMessage(msg)
 
@@ -248,43 +327,31 @@ class MessageAssembler(object):
             @type  msg:     str
         """
         uri = msg[:32]
-        binaryData = StringIO()
-        binaryData.write(msg[32:])
+        binaryData = StringIO(msg[32:])
 
-        for msg in self._incompleteMsgs:
-            if msg.addBinary(uri, binaryData):
-                break
-        else:
-            self._binaries[uri] = (binaryData, datetime.now())
+        incompleteMsg = self._uriIndex.pop(uri, None)
 
-    def _recursiveURISearch(self, multidict):
-        """ Internally used method to find binary data in incoming messages.
+        if not (incompleteMsg and incompleteMsg.addBinary(uri, binaryData)):
+            self._binaries[uri] = (binaryData, time())
 
-            @return:    List of tuples of the forms (uri, dict, key) or
-                        (uri, list, index)
-        """
-        valueList = []
-        keys = []
-
-        for k, v in multidict.iteritems():
-            if isinstance(v, dict):
-                valueList += self._recursiveURISearch(v)
-            elif k[-1] == '*':
-                keys.append(k)
-
-        for k in keys:
-            ele = multidict.pop(k)
+    def _processString(self, msg, hasURIs):
+        """ Internally used method to process a decoded string message.
 
-            if isinstance(ele, list):
-                lst = [None] * len(ele)
-                multidict[k[:-1]] = lst
+            @param msg:     Decoded string message.
+            @type  msg:     { str : ... }
 
-                for i, uri in enumerate(ele):
-                    valueList.append((uri, lst, i))
-            else:
-                valueList.append((ele, multidict, k[:-1]))
+            @param hasURIs: Flag which is False if the raw string message
+                            contains no key ending with '*', i.e. the search
+                            for references to binary messages can be
+                            skipped.
+            @type  hasURIs: bool
+        """
+        uris = _recursiveURISearch(msg) if hasURIs else None
 
-        return valueList
+        if uris:
+            self._handleString(msg, uris)
+        else:
+            self._protocol.processCompleteMessage(msg)
 
     def processMessage(self, msg, binary):
         """ This method is used to process any messages which should pass
@@ -293,17 +360,17 @@ class MessageAssembler(object):
         if binary:
             self._handleBinary(msg)
         else:
+            # Keys referencing binary messages always end with '*"' in the
+            # raw message; a cheap substring test avoids walking the decoded
+            # message in the common case without any binary data
+            hasURIs = '*"' in msg
+
             try:
                 msg = json.loads(msg)
             except ValueError:
                 raise InvalidRequest('Message is not in valid JSON format.')
 
-            uris = self._recursiveURISearch(msg)
-
-            if uris:
-                self._handleString(msg, uris)
-            else:
-                self._protocol.processCompleteMessage(msg)
+            self._processString(msg, hasURIs)
 
     def start(self):
         """ Start the cleaner of the assembler.
@@ -314,7 +381,8 @@ class MessageAssembler(object):
         """ Stop the cleaner of the assembler and remove any circular
             references.
         """
-        self._incompleteMsgs = set()
+        self._incompleteMsgs = OrderedDict()
+        self._uriIndex = {}
 
         if self._cleaner.running:
             self._cleaner.stop()
@@ -322,23 +390,41 @@ class MessageAssembler(object):
     def _cleanUp(self):
         """ Internally used method to remove old incomplete messages.
         """
-        limit = datetime.now() - timedelta(seconds=self._timeout)
+        limit = time() - self._timeout
+
+        # Both containers are ordered by age; therefore, only the front has to
+        # be inspected
+        incompleteMsgs = self._incompleteMsgs
+        dropped = 0
+
+        while incompleteMsgs:
+            msg = next(iter(incompleteMsgs))
+
+            if incompleteMsgs[msg] >= limit:
+                break
 
-        toClean = [msg for msg in self._incompleteMsgs if msg.older(limit)]
+            del incompleteMsgs[msg]
+            dropped += 1
 
-        if toClean:
-            for msg in toClean:
-                self._incompleteMsgs.remove(msg)
+            for uri in msg.uris:
+                self._uriIndex.pop(uri, None)
 
+        if dropped:
             log.msg('{0} incomplete messages have been dropped '
-                    'from assembler.'.format(len(toClean)))
+                    'from assembler.'.format(dropped))
+
+        binaries = self._binaries
+        dropped = 0
 
-        toClean = [uri for uri, (_, timestamp) in self._binaries.iteritems()
-                   if timestamp < limit]
+        while binaries:
+            uri = next(iter(binaries))
+
+            if binaries[uri][1] >= limit:
+                break
 
-        if toClean:
-            for uri in toClean:
-                del self._binaries[uri]
+            del binaries[uri]
+            dropped += 1
 
+        if dropped:
             log.msg('{0} unused binaries have been dropped '
-                    'from assembler.'.format(len(toClean)))
+                    'from assembler.'.format(dropped))
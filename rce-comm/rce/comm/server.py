@@ -43,6 +43,7 @@ from zope.interface import implements
 
 # twisted specific imports
 #from twisted.python import log
+from twisted.internet import reactor
 from twisted.python.failure import Failure
 from twisted.cred.error import UnauthorizedLogin
 from twisted.web.resource import Resource
@@ -50,7 +51,7 @@ from twisted.web.server import NOT_DONE_YET
 
 # Autobahn specific imports
 from autobahn import httpstatus
-from autobahn.websocket import HttpException, \
+from autobahn.websocket import HttpException, WebSocketProtocol, \
     WebSocketServerFactory, WebSocketServerProtocol
 
 # rce specific imports
@@ -199,6 +200,16 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
         self._realm = realm
         self._assembler = MessageAssembler(self, self.MSG_QUEUE_TIMEOUT)
         self._avatar = None
+        self._processReceivedMessage = None
+
+        # List of (payload, binary) tuples which are waiting to be written;
+        # binary is None if payload is a prepared message
+        self._pendingWrites = []
+        self._flushCall = None
+
+        # List of the framed data which is collected while flushing the
+        # pending writes; None if no flush is in progress
+        self._frames = None
 
     def onConnect(self, req):
         """ Method is called by the Autobahn engine when a request to establish
@@ -241,6 +252,7 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
 
         self._realm.registerWebsocketProtocol(avatar, self)
         self._avatar = avatar
+        self._processReceivedMessage = avatar.processReceivedMessage
         self._assembler.start()
 
     def _authenticate_failed(self, e):
@@ -270,19 +282,13 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
         except KeyError as e:
             raise InvalidRequest('Message is missing key: {0}'.format(e))
 
-        if msgType == types.DATA_MESSAGE:
-            self._process_DataMessage(data)
-        elif msgType == types.CONFIGURE_COMPONENT:
-            self._process_configureComponent(data)
-        elif msgType == types.CONFIGURE_CONNECTION:
-            self._process_configureConnection(data)
-        elif msgType == types.CREATE_CONTAINER:
-            self._process_createContainer(data)
-        elif msgType == types.DESTROY_CONTAINER:
-            self._process_destroyContainer(data)
-        else:
+        try:
+            handler = self._HANDLERS[msgType]
+        except (KeyError, TypeError):
             raise InvalidRequest('This message type is not supported.')
 
+        handler(self, data)
+
     def _process_createContainer(self, data):
         """ Internally used method to process a request to create a container.
         """
@@ -306,88 +312,126 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
         """ Internally used method to process a request to configure
             components.
         """
-        for node in data.pop('addNodes', []):
-            try:
-                self._avatar.addNode(node['containerTag'],
-                                     node['nodeTag'],
-                                     node['pkg'],
-                                     node['exe'],
-                                     node.get('args', ''),
-                                     node.get('name', ''),
-                                     node.get('namespace', ''))
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'addNodes' is missing key: "
-                                     '{0}'.format(e))
-
-        for node in data.pop('removeNodes', []):
-            try:
-                self._avatar.removeNode(node['containerTag'],
-                                        node['nodeTag'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'removeNodes' is missing key: "
-                                     '{0}'.format(e))
-
-        for conf in data.pop('addInterfaces', []):
-            try:
-                self._avatar.addInterface(conf['endpointTag'],
-                                          conf['interfaceTag'],
-                                          conf['interfaceType'],
-                                          conf['className'],
-                                          conf.get('addr', ''))
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'addInterfaces' is missing "
-                                     'key: {0}'.format(e))
-
-        for conf in data.pop('removeInterfaces', []):
-            try:
-                self._avatar.removeInterface(conf['endpointTag'],
-                                             conf['interfaceTag'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'removeInterfaces' is missing "
-                                     'key: {0}'.format(e))
-
-        for param in data.pop('setParam', []):
-            try:
-                self._avatar.addParameter(param['containerTag'],
-                                          param['name'],
-                                          param['value'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'setParam' is missing key: "
-                                     '{0}'.format(e))
-
-        for param in data.pop('deleteParam', []):
-            try:
-                self._avatar.removeParameter(param['containerTag'],
-                                             param['name'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'deleteParam' is missing key: "
-                                     '{0}'.format(e))
+        nodes = data.pop('addNodes', None)
+
+        if nodes:
+            addNode = self._avatar.addNode
+
+            for node in nodes:
+                try:
+                    addNode(node['containerTag'], node['nodeTag'],
+                            node['pkg'], node['exe'], node.get('args', ''),
+                            node.get('name', ''), node.get('namespace', ''))
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'addNodes' is missing key: "
+                                         '{0}'.format(e))
+
+        nodes = data.pop('removeNodes', None)
+
+        if nodes:
+            removeNode = self._avatar.removeNode
+
+            for node in nodes:
+                try:
+                    removeNode(node['containerTag'], node['nodeTag'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'removeNodes' is missing "
+                                         'key: {0}'.format(e))
+
+        confs = data.pop('addInterfaces', None)
+
+        if confs:
+            addInterface = self._avatar.addInterface
+
+            for conf in confs:
+                try:
+                    addInterface(conf['endpointTag'], conf['interfaceTag'],
+                                 conf['interfaceType'], conf['className'],
+                                 conf.get('addr', ''))
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'addInterfaces' is missing "
+                                         'key: {0}'.format(e))
+
+        confs = data.pop('removeInterfaces', None)
+
+        if confs:
+            removeInterface = self._avatar.removeInterface
+
+            for conf in confs:
+                try:
+                    removeInterface(conf['endpointTag'], conf['interfaceTag'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'removeInterfaces' is "
+                                         'missing key: {0}'.format(e))
+
+        params = data.pop('setParam', None)
+
+        if params:
+            addParameter = self._avatar.addParameter
+
+            for param in params:
+                try:
+                    addParameter(param['containerTag'], param['name'],
+                                 param['value'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'setParam' is missing key: "
+                                         '{0}'.format(e))
+
+        params = data.pop('deleteParam', None)
+
+        if params:
+            removeParameter = self._avatar.removeParameter
+
+            for param in params:
+                try:
+                    removeParameter(param['containerTag'], param['name'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'deleteParam' is missing "
+                                         'key: {0}'.format(e))
 
     def _process_configureConnection(self, data):
         """ Internally used method to process a request to configure
             connections.
         """
-        for conf in data.pop('connect', []):
-            try:
-                self._avatar.addConnection(conf['tagA'], conf['tagB'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'connect' is missing key: "
-                                     '{0}'.format(e))
-
-        for conf in data.pop('disconnect', []):
-            try:
-                self._avatar.removeConnection(conf['tagA'], conf['tagB'])
-            except KeyError as e:
-                raise InvalidRequest("Can not process 'ConfigureComponent' "
-                                     "request. 'disconnect' is missing key: "
-                                     '{0}'.format(e))
+        confs = data.pop('connect', None)
+
+        if confs:
+            addConnection = self._avatar.addConnection
+
+            for conf in confs:
+                try:
+                    addConnection(conf['tagA'], conf['tagB'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'connect' is missing key: "
+                                         '{0}'.format(e))
+
+        confs = data.pop('disconnect', None)
+
+        if confs:
+            removeConnection = self._avatar.removeConnection
+
+            for conf in confs:
+                try:
+                    removeConnection(conf['tagA'], conf['tagB'])
+                except KeyError as e:
+                    raise InvalidRequest("Can not process "
+                                         "'ConfigureComponent' "
+                                         "request. 'disconnect' is missing "
+                                         'key: {0}'.format(e))
 
     def _process_DataMessage(self, data):
         """ Internally used method to process a data message.
@@ -405,7 +449,17 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
             raise InvalidRequest("Can not process 'DataMessage' request. "
                                  'Message ID can not be longer than 255.')
 
-        self._avatar.processReceivedMessage(iTag, mType, msgID, msg)
+        self._processReceivedMessage(iTag, mType, msgID, msg)
+
+    # Dispatch table used in processCompleteMessage; message types are mapped
+    # to the (unbound) handler functions defined above
+    _HANDLERS = {
+        types.DATA_MESSAGE : _process_DataMessage,
+        types.CONFIGURE_COMPONENT : _process_configureComponent,
+        types.CONFIGURE_CONNECTION : _process_configureConnection,
+        types.CREATE_CONTAINER : _process_createContainer,
+        types.DESTROY_CONTAINER : _process_destroyContainer
+    }
 
     def onMessage(self, msg, binary):
         """ Method is called by the Autobahn engine when a message has been
@@ -445,11 +499,77 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
         """
         uriBinary, msgURI = recursiveBinarySearch(msg)
 
-        WebSocketServerProtocol.sendMessage(self, json.dumps(msgURI))
+        pending = self._pendingWrites
+        pending.append((json.dumps(msgURI), False))
 
         for binData in uriBinary:
-            WebSocketServerProtocol.sendMessage(self,
-                binData[0] + binData[1].getvalue(), binary=True)
+            pending.append((binData[0] + binData[1].getvalue(), True))
+
+        if not self._flushCall:
+            self._flushCall = reactor.callLater(0, self._flushWrites)
+
+    def _sendPreparedMessage(self, key, msg):
+        """ Internally used method to send a message without any binary data
+            which is sent repeatedly and is therefore only encoded and framed
+            once by the factory.
+
+            @param key:     Hashable key which identifies the message.
+
+            @param msg:     Message which should be sent.
+        """
+        self._pendingWrites.append((self.factory.prepare(key, msg), None))
+
+        if not self._flushCall:
+            self._flushCall = reactor.callLater(0, self._flushWrites)
+
+    def _flushWrites(self):
+        """ Internally used method to write all queued messages with a single
+            write to the transport, such that all messages which have been
+            sent during the same iteration of the reactor are coalesced.
+        """
+        if self._flushCall and self._flushCall.active():
+            self._flushCall.cancel()
+
+        self._flushCall = None
+        pending, self._pendingWrites = self._pendingWrites, []
+        send = WebSocketServerProtocol.sendMessage
+
+        # The frames are collected by 'sendData' and written at the end
+        self._frames = frames = []
+
+        try:
+            for payload, binary in pending:
+                if binary is None:
+                    # Contrary to 'sendMessage', 'sendPreparedMessage' does not
+                    # check the state of the connection itself
+                    if self.state == WebSocketProtocol.STATE_OPEN:
+                        WebSocketServerProtocol.sendPreparedMessage(self,
+                                                                    payload)
+                else:
+                    send(self, payload, binary)
+        finally:
+            self._frames = None
+
+            if frames:
+                self.transport.writeSequence(frames)
+
+                if self.logOctets:
+                    self.logTxOctets(''.join(frames), False)
+
+    def sendData(self, data, sync=False, chopsize=None):
+        """ Write the data to the transport or collect it, if the pending
+            writes are flushed.
+
+            (Overwrites method from autobahn.websocket.WebSocketProtocol)
+        """
+        frames = self._frames
+
+        # Data which has to be queued by Autobahn is never collected, as
+        # otherwise the order of the written data could change
+        if frames is None or sync or chopsize or self.send_queue:
+            WebSocketServerProtocol.sendData(self, data, sync, chopsize)
+        else:
+            frames.append(data)
 
     def sendDataMessage(self, iTag, clsName, msgID, msg):
         """ Callback for Connection object to send a data message to the robot
@@ -491,9 +611,10 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
                                 be active or not.
             @type  status:      bool
         """
-        self.sendMessage({'type' : types.STATUS,
-                          'data' : {'topic' : types.STATUS_INTERFACE,
-                                    'iTag' : iTag, 'status' : status}})
+        msg = {'type' : types.STATUS,
+               'data' : {'topic' : types.STATUS_INTERFACE,
+                         'iTag' : iTag, 'status' : status}}
+        self._sendPreparedMessage((types.STATUS, iTag, status), msg)
 
     def sendErrorMessage(self, msg):
         """ Callback for Connection object to send an error message to the robot
@@ -504,6 +625,16 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
         """
         self.sendMessage({'type' : types.ERROR, 'data' : msg})
 
+    def dropConnection(self, abort=False):
+        """ Drop the connection after all queued messages have been written.
+
+            (Overwrites method from autobahn.websocket.WebSocketServerProtocol)
+        """
+        if self._pendingWrites:
+            self._flushWrites()
+
+        WebSocketServerProtocol.dropConnection(self, abort)
+
     def onClose(self, wasClean, code, reason):
         """ Method is called by the Autobahn engine when the connection has
             been lost.
@@ -513,14 +644,23 @@ class RobotWebSocketProtocol(WebSocketServerProtocol):
 
         self._assembler.stop()
 
+        if self._flushCall and self._flushCall.active():
+            self._flushCall.cancel()
+
         self._avatar = None
+        self._processReceivedMessage = None
         self._assembler = None
+        self._pendingWrites = []
+        self._flushCall = None
 
 
 class CloudEngineWebSocketFactory(WebSocketServerFactory):
     """ Factory which is used for the connections from the robots to the
         RoboEarth Cloud Engine.
     """
+    # CONFIG
+    PREPARED_CACHE_SIZE = 1024
+
     def __init__(self, realm, url, **kw):
         """ Initialize the Factory.
 
@@ -539,8 +679,42 @@ class CloudEngineWebSocketFactory(WebSocketServerFactory):
         """
         WebSocketServerFactory.__init__(self, url, **kw)
 
+        # The UTF-8 encoding of text messages is already validated by the JSON
+        # decoder in the message assembler
+        self.setProtocolOptions(utf8validateIncoming=False)
+
         self._realm = realm
 
+        # Dictionary with the message key as key and the prepared message as
+        # value
+        self._prepared = {}
+
+    def prepare(self, key, msg):
+        """ Get the prepared message, i.e. encoded and framed once, for a
+            message without binary data which is sent repeatedly.
+
+            @param key:         Hashable key which identifies the message.
+
+            @param msg:         Message which should be prepared. It has to
+                                be a JSON compatible dictionary without any
+                                StringIO instances.
+            @type  msg:         dict
+
+            @return:            Prepared message which can be sent using
+                                sendPreparedMessage.
+            @rtype:             autobahn.websocket.PreparedMessage
+        """
+        prepared = self._prepared.get(key)
+
+        if prepared is None:
+            if len(self._prepared) >= self.PREPARED_CACHE_SIZE:
+                self._prepared = {}
+
+            prepared = self.prepareMessage(json.dumps(msg))
+            self._prepared[key] = prepared
+
+        return prepared
+
     def buildProtocol(self, addr):
         """ Method is called by the twisted reactor when a new connection
             attempt is made.
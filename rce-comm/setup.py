@@ -32,6 +32,8 @@
 
 from setuptools import setup
 
+from rce.util.build import getExtensions, OptionalBuildExt
+
 LONG_DESCRIPTION = """ TODO """
 
 setup(
@@ -47,5 +49,7 @@ setup(
     keywords='',
     platforms='',
     namespace_packages=['rce'],
-    packages=['rce', 'rce.comm']
+    packages=['rce', 'rce.comm'],
+    ext_modules=getExtensions('rce/comm/assembler.py'),
+    cmdclass={'build_ext': OptionalBuildExt}
 )
@@ -32,6 +32,8 @@
 
 # Python specific imports
 from collections import Counter
+from heapq import heapify, heappop, heappush
+from itertools import count
 from random import choice
 from string import letters
 
@@ -73,14 +75,46 @@ class Distributor(object):
         """
         self._robots = set()
 
+        # Heap of (active, nr, robot) tuples which is used to select the robot
+        # process with the least active connections; outdated entries are
+        # only removed when they reach the top of the heap
+        self._heap = []
+        self._counter = count()
+
+    def _pushRobotProcess(self, robot):
+        """ Internally used method to add an entry with the current number of
+            active connections of the robot process to the heap.
+        """
+        heap = self._heap
+
+        # Rebuild the heap if there are too many outdated entries
+        if len(heap) > 4 * len(self._robots) + 16:
+            heap = [(r.active, next(self._counter), r) for r in self._robots]
+            heapify(heap)
+            self._heap = heap
+        else:
+            heappush(heap, (robot.active, next(self._counter), robot))
+
     def registerRobotProcess(self, robot):
         assert robot not in self._robots
         self._robots.add(robot)
+        self._pushRobotProcess(robot)
 
     def unregisterRobotProcess(self, robot):
         assert robot in self._robots
         self._robots.remove(robot)
 
+    def updateRobotProcess(self, robot):
+        """ Callback for RobotEndpoint to notify the distributor that the
+            number of active connections in the robot process changed.
+
+            @param robot:       Robot endpoint whose number of active
+                                connections changed.
+            @type  robot:       rce.core.robot.RobotEndpoint
+        """
+        if robot in self._robots:
+            self._pushRobotProcess(robot)
+
     def getNextLocation(self):
         """ Get the next endpoint running in an robot process to create a new
             robot WebSocket connection.
@@ -89,13 +123,21 @@ class Distributor(object):
             @rtype:             rce.core.robot.RobotEndpoint
                                 (subclass of rce.core.base.Proxy)
         """
-        try:
-            return min(self._robots, key=lambda r: r.active)
-        except ValueError:
-            raise RobotProcessError('There is no free robot process.')
+        heap = self._heap
+
+        while heap:
+            active, _, robot = heap[0]
+
+            if robot in self._robots and robot.active == active:
+                return robot
+
+            heappop(heap)
+
+        raise RobotProcessError('There is no free robot process.')
 
     def cleanUp(self):
         assert len(self._robots) == 0
+        self._heap = []
 
 
 # TODO: Should probably be renamed...
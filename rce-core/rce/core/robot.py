@@ -98,6 +98,18 @@ class RobotEndpoint(Endpoint):
         """
         return len(self._namespaces)
 
+    def registerNamespace(self, namespace):
+        super(RobotEndpoint, self).registerNamespace(namespace)
+
+        if self._distributor:
+            self._distributor.updateRobotProcess(self)
+
+    def unregisterNamespace(self, namespace):
+        super(RobotEndpoint, self).unregisterNamespace(namespace)
+
+        if self._distributor:
+            self._distributor.updateRobotProcess(self)
+
     def getAddress(self):
         """ Get the address of the robot endpoint's internal communication
             server.
@@ -35,8 +35,9 @@ from uuid import uuid4
 from hashlib import md5
 
 # twisted specific imports
-from twisted.internet.defer import DeferredList
-from twisted.spread.pb import Viewable
+from twisted.python import log
+from twisted.internet.defer import DeferredList, fail, maybeDeferred
+from twisted.spread.pb import Error, Viewable
 
 # rce specific imports
 from rce.util.name import validateName, IllegalName
@@ -362,6 +363,67 @@ class ControlView(Viewable):
 
         # TODO: Return some info about success/failure of request
 
+    def view_batch(self, user, calls):
+        """ Execute multiple requests which have been sent in a single
+            message. The requests are executed in the given order.
+
+            @param user:        User for which the requests are executed.
+            @type  user:        rce.core.user.User
+
+            @param calls:       List of requests where each request is a tuple
+                                containing the name of the request (without
+                                the prefix 'view_') and the arguments.
+            @type  calls:       [ (str, (...)) ]
+
+            @return:            List of tuples containing a flag which is True
+                                if the request was successful and the result
+                                or the error message, respectively, for each
+                                request. (type: [ (bool, ...) ])
+            @rtype:             twisted.internet.defer.Deferred
+        """
+        deferreds = []
+
+        for name, args in calls:
+            method = None
+
+            if name != 'batch':
+                method = getattr(self, 'view_{0}'.format(name), None)
+
+            if method:
+                d = maybeDeferred(method, user, *args)
+            else:
+                d = fail(InvalidRequest("Request '{0}' is not "
+                                        'supported.'.format(name)))
+
+            deferreds.append(d)
+
+        d = DeferredList(deferreds, consumeErrors=True)
+        d.addCallback(self._cbBatch)
+        return d
+
+    def _cbBatch(self, results):
+        """ Internally used method as a callback to convert the results of
+            the requests of a batch.
+
+            Failures which are not a pb.Error, i.e. not an InvalidRequest,
+            are logged with their traceback, as PB does for the failures of
+            single remote calls; only the error message is sent back.
+        """
+        converted = []
+
+        for success, result in results:
+            if success:
+                converted.append((True, result))
+            else:
+                if not result.check(Error):
+                    log.msg('Peer will receive following error of a batched '
+                            'request:')
+                    log.err(result)
+
+                converted.append((False, result.getErrorMessage()))
+
+        return converted
+
 
 class MonitorView(Viewable):
     """ View implementing all monitor actions which a normal user can perform to
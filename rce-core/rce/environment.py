@@ -56,6 +56,13 @@ class Environment(Namespace):
     """ Representation of the namespace in the environment process, which is
         part of the cloud engine internal communication.
     """
+    _MAP = {
+        Types.encode('PublisherInterface') : PublisherInterface,
+        Types.encode('SubscriberInterface') : SubscriberInterface,
+        Types.encode('ServiceClientInterface') : ServiceClientInterface,
+        Types.encode('ServiceProviderInterface') : ServiceProviderInterface
+    }
+
     def __init__(self, endpoint):
         """ Initialize the Environment.
 
@@ -65,14 +72,6 @@ class Environment(Namespace):
         """
         Namespace.__init__(self, endpoint)
 
-        interface_map = {
-            Types.encode('PublisherInterface') : PublisherInterface,
-            Types.encode('SubscriberInterface') : SubscriberInterface,
-            Types.encode('ServiceClientInterface') : ServiceClientInterface,
-            Types.encode('ServiceProviderInterface') : ServiceProviderInterface
-        }
-        self._map.update(interface_map)
-
         self._nodes = set()
         self._parameters = set()
 
@@ -32,6 +32,7 @@
 
 # Python specific imports
 import sys
+from collections import deque
 
 # ROS specific imports
 from rospkg.environment import get_ros_paths
@@ -42,6 +43,7 @@ from zope.interface import implements
 # twisted specific imports
 from twisted.python import log
 from twisted.cred.credentials import UsernamePassword
+from twisted.internet.task import LoopingCall
 from twisted.spread.pb import PBClientFactory, \
     DeadReferenceError, PBConnectionLost
 
@@ -60,6 +62,7 @@ from rce.monitor.interface.robot import PublisherConverter, \
     SubscriberConverter, ServiceClientConverter, ServiceProviderConverter, \
     PublisherForwarder, SubscriberForwarder, \
     ServiceClientForwarder, ServiceProviderForwarder
+from rce.slave.dispatcher import Dispatcher
 from rce.slave.endpoint import Endpoint
 from rce.slave.namespace import Namespace
 from rce.slave.interface import Types
@@ -175,6 +178,15 @@ class Connection(object):
 
     reportError.__doc__ = IProtocol.get('sendErrorMessage').getDoc()
 
+    def reportDeadConnection(self):
+        """ Callback for View to report that the connection to the Master
+            process is lost, in which case the WebSocket connection to the
+            robot is dropped.
+        """
+        if self._protocol:
+            self._protocol.sendErrorMessage('Dead Connection')
+            self._protocol.dropConnection()
+
     def sendMessage(self, iTag, clsName, msgID, msg):
         if not self._protocol:
             # TODO: What should we do here?
@@ -200,83 +212,67 @@ class Connection(object):
 
     # Forwarding to View
 
-    def createContainer(self, tag, data={}):
+    def _getView(self):
+        """ Internally used method to get the view to which the requests of
+            the robot client are forwarded.
+
+            @return:            View of the robot client.
+            @rtype:             rce.robot.RobotView
+
+            @raise:             rce.robot.ForwardingError if there is no view.
+        """
         if not self._view:
             raise ForwardingError('Reference of the view is missing.')
 
-        self._view.createContainer(tag, data)
+        return self._view
+
+    def createContainer(self, tag, data={}):
+        self._getView().createContainer(tag, data)
 
     createContainer.__doc__ = IRobot.get('createContainer').getDoc()
 
     def destroyContainer(self, tag):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.destroyContainer(tag)
+        self._getView().destroyContainer(tag)
 
     destroyContainer.__doc__ = IRobot.get('destroyContainer').getDoc()
 
     def addNode(self, cTag, nTag, pkg, exe, args='', name='', namespace=''):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.addNode(cTag, nTag, pkg, exe, args, name, namespace)
+        self._getView().addNode(cTag, nTag, pkg, exe, args, name, namespace)
 
     addNode.__doc__ = IRobot.get('addNode').getDoc()
 
     def removeNode(self, cTag, nTag):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.removeNode(cTag, nTag)
+        self._getView().removeNode(cTag, nTag)
 
     removeNode.__doc__ = IRobot.get('removeNode').getDoc()
 
     def addInterface(self, eTag, iTag, iType, clsName, addr=''):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.addInterface(eTag, iTag, iType, clsName, addr)
+        self._getView().addInterface(eTag, iTag, iType, clsName, addr)
 
     addInterface.__doc__ = IRobot.get('addInterface').getDoc()
 
     def removeInterface(self, eTag, iTag):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.removeInterface(eTag, iTag)
+        self._getView().removeInterface(eTag, iTag)
 
     removeInterface.__doc__ = IRobot.get('removeInterface').getDoc()
 
     def addParameter(self, cTag, name, value):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.addParameter(cTag, name, value)
+        self._getView().addParameter(cTag, name, value)
 
     addParameter.__doc__ = IRobot.get('addParameter').getDoc()
 
     def removeParameter(self, cTag, name):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.removeParameter(cTag, name)
+        self._getView().removeParameter(cTag, name)
 
     removeParameter.__doc__ = IRobot.get('removeParameter').getDoc()
 
     def addConnection(self, tagA, tagB):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.addConnection(tagA, tagB)
+        self._getView().addConnection(tagA, tagB)
 
     addConnection.__doc__ = IRobot.get('addConnection').getDoc()
 
     def removeConnection(self, tagA, tagB):
-        if not self._view:
-            raise ForwardingError('Reference of the view is missing.')
-
-        self._view.removeConnection(tagA, tagB)
+        self._getView().removeConnection(tagA, tagB)
 
     removeConnection.__doc__ = IRobot.get('removeConnection').getDoc()
 
@@ -294,10 +290,25 @@ class Connection(object):
 
 class RobotView(object):
     """ Wrapper for a RemoteReference of type RobotView.
+
+        All requests which are made during the same iteration of the reactor
+        are sent to the Master process in a single remote call.
+
+        The reply to a batch is only sent once all of its requests have
+        completed. Requests which take a long time to complete are therefore
+        sent in a remote call of their own, such that they do not delay the
+        error messages of the other requests.
     """
     implements(IRobot)
 
-    def __init__(self, view, connection):
+    # CONFIG
+    MAX_BATCH_SIZE = 64
+
+    # Requests which are not batched, as their remote call only returns once
+    # the requested resources are ready
+    STANDALONE_REQUESTS = frozenset(('createContainer',))
+
+    def __init__(self, view, connection, reactor):
         """ Initialize the wrapper.
 
             @param view:        Remote reference referencing the RobotView
@@ -308,121 +319,156 @@ class RobotView(object):
                                 client for which the wrapped RobotView was
                                 retrieved from the Master process.
             @type  connection:  rce.robot.Connection
+
+            @param reactor:     Reference to the twisted reactor used in this
+                                robot process.
+            @type  reactor:     twisted::reactor
         """
         self._view = view
         self._connection = connection
+        self._reactor = reactor
+
+        # List of (method, args) tuples which are waiting to be sent
+        self._pendingCalls = []
+        self._flushCall = None
+
+        # Bind the callbacks once instead of for every remote call
+        self._errback = self._reportError
+        self._batchCallback = self._reportBatchErrors
 
     def _reportError(self, failure):
         """ Method is used internally as an errback to send an error message to
             the robot client.
         """
-        self._connection.reportError(failure.getErrorMessage())
+        if failure.check(DeadReferenceError, PBConnectionLost):
+            self._connection.reportDeadConnection()
+        else:
+            self._connection.reportError(failure.getErrorMessage())
+
+    def _reportBatchErrors(self, results):
+        """ Method is used internally as a callback to send an error message
+            to the robot client for each failed request of a batch.
+        """
+        for success, result in results:
+            if not success:
+                self._connection.reportError(result)
 
-    def createContainer(self, tag, data={}):
-        try:
-            d = self._view.callRemote('createContainer', tag, data)
-        except (DeadReferenceError, PBConnectionLost):
+    def _enqueue(self, method, *args):
+        """ Internally used method to queue a request for the Master process.
+
+            @param method:      Name of the remote method which should be
+                                called.
+            @type  method:      str
+
+            @param args:        Arguments of the remote call.
+        """
+        if self._view.broker.disconnected:
             raise DeadConnection
 
-        d.addErrback(self._reportError)
+        if method in self.STANDALONE_REQUESTS:
+            # Send the queued requests first to keep the order of the requests
+            self._flush()
+            self._send([(method, args)])
+            return
 
-    createContainer.__doc__ = IRobot.get('createContainer').getDoc()
+        self._pendingCalls.append((method, args))
 
-    def destroyContainer(self, tag):
+        if len(self._pendingCalls) >= self.MAX_BATCH_SIZE:
+            self._flush()
+        elif not self._flushCall:
+            self._flushCall = self._reactor.callLater(0, self._flush)
+
+    def _flush(self):
+        """ Internally used method to send all queued requests to the Master
+            process.
+        """
+        if self._flushCall and self._flushCall.active():
+            self._flushCall.cancel()
+
+        self._flushCall = None
+        calls, self._pendingCalls = self._pendingCalls, []
+
+        if calls:
+            self._send(calls)
+
+    def _send(self, calls):
+        """ Internally used method to send requests to the Master process.
+
+            @param calls:       List of (method, args) tuples of the requests
+                                which should be sent.
+            @type  calls:       [ (str, (...)) ]
+        """
         try:
-            d = self._view.callRemote('destroyContainer', tag)
+            if len(calls) == 1:
+                method, args = calls[0]
+                d = self._view.callRemote(method, *args)
+            else:
+                d = self._view.callRemote('batch', calls)
+                d.addCallback(self._batchCallback)
         except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
+            self._connection.reportDeadConnection()
+            return
+
+        d.addErrback(self._errback)
+
+    def createContainer(self, tag, data={}):
+        self._enqueue('createContainer', tag, data)
+
+    createContainer.__doc__ = IRobot.get('createContainer').getDoc()
 
-        d.addErrback(self._reportError)
+    def destroyContainer(self, tag):
+        self._enqueue('destroyContainer', tag)
 
     destroyContainer.__doc__ = IRobot.get('destroyContainer').getDoc()
 
     def addNode(self, cTag, nTag, pkg, exe, args='', name='', namespace=''):
-        try:
-            d = self._view.callRemote('addNode', cTag, nTag, pkg, exe, args,
-                                      name, namespace)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('addNode', cTag, nTag, pkg, exe, args, name, namespace)
 
     addNode.__doc__ = IRobot.get('addNode').getDoc()
 
     def removeNode(self, cTag, nTag):
-        try:
-            d = self._view.callRemote('removeNode', cTag, nTag)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('removeNode', cTag, nTag)
 
     removeNode.__doc__ = IRobot.get('removeNode').getDoc()
 
     def addInterface(self, eTag, iTag, iType, clsName, addr=''):
-        try:
-            d = self._view.callRemote('addInterface', eTag, iTag, iType,
-                                      clsName, addr)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('addInterface', eTag, iTag, iType, clsName, addr)
 
     addInterface.__doc__ = IRobot.get('addInterface').getDoc()
 
     def removeInterface(self, eTag, iTag):
-        try:
-            d = self._view.callRemote('removeInterface', eTag, iTag)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('removeInterface', eTag, iTag)
 
     removeInterface.__doc__ = IRobot.get('removeInterface').getDoc()
 
     def addParameter(self, cTag, name, value):
-        try:
-            d = self._view.callRemote('addParameter', cTag, name, value)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('addParameter', cTag, name, value)
 
     addParameter.__doc__ = IRobot.get('addParameter').getDoc()
 
     def removeParameter(self, cTag, name):
-        try:
-            d = self._view.callRemote('removeParameter', cTag, name)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('removeParameter', cTag, name)
 
     removeParameter.__doc__ = IRobot.get('removeParameter').getDoc()
 
     def addConnection(self, tagA, tagB):
-        try:
-            d = self._view.callRemote('addConnection', tagA, tagB)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('addConnection', tagA, tagB)
 
     addConnection.__doc__ = IRobot.get('addConnection').getDoc()
 
     def removeConnection(self, tagA, tagB):
-        try:
-            d = self._view.callRemote('removeConnection', tagA, tagB)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
-
-        d.addErrback(self._reportError)
+        self._enqueue('removeConnection', tagA, tagB)
 
     removeConnection.__doc__ = IRobot.get('removeConnection').getDoc()
 
     def destroy(self):
         """ # TODO: Add doc
         """
+        if self._flushCall and self._flushCall.active():
+            self._flushCall.cancel()
+
+        self._flushCall = None
+        self._pendingCalls = []
         self._connection = None
         self._view = None
 
@@ -431,6 +477,17 @@ class Robot(Namespace):
     """ Representation of a namespace in the robot process, which is part of
         the cloud engine internal communication.
     """
+    _MAP = {
+        Types.encode('PublisherConverter') : PublisherConverter,
+        Types.encode('SubscriberConverter') : SubscriberConverter,
+        Types.encode('ServiceClientConverter') : ServiceClientConverter,
+        Types.encode('ServiceProviderConverter') : ServiceProviderConverter,
+        Types.encode('PublisherForwarder') : PublisherForwarder,
+        Types.encode('SubscriberForwarder') : SubscriberForwarder,
+        Types.encode('ServiceClientForwarder') : ServiceClientForwarder,
+        Types.encode('ServiceProviderForwarder') : ServiceProviderForwarder
+    }
+
     def __init__(self, endpoint, connection):
         """ Initialize the Robot.
 
@@ -443,19 +500,13 @@ class Robot(Namespace):
         """
         Namespace.__init__(self, endpoint)
 
-        interface_map = {
-            Types.encode('PublisherConverter') : PublisherConverter,
-            Types.encode('SubscriberConverter') : SubscriberConverter,
-            Types.encode('ServiceClientConverter') : ServiceClientConverter,
-            Types.encode('ServiceProviderConverter') : ServiceProviderConverter,
-            Types.encode('PublisherForwarder') : PublisherForwarder,
-            Types.encode('SubscriberForwarder') : SubscriberForwarder,
-            Types.encode('ServiceClientForwarder') : ServiceClientForwarder,
-            Types.encode('ServiceProviderForwarder') : ServiceProviderForwarder
-        }
-        self._map.update(interface_map)
-
         self._connection = connection
+        self._send = connection.sendMessage
+
+        # Dispatcher for the received data messages; 'receivedFromClient' is
+        # bound directly to the dispatcher to save a method call per message
+        self._dispatcher = Dispatcher()
+        self.receivedFromClient = self._dispatcher.receive
 
     @property
     def converter(self):
@@ -464,6 +515,14 @@ class Robot(Namespace):
         """
         return self._endpoint.converter
 
+    def registerInterface(self, interface):
+        Namespace.registerInterface(self, interface)
+        self._dispatcher.register(interface.addr, interface.receive)
+
+    def unregisterInterface(self, interface):
+        self._dispatcher.unregister(interface.addr)
+        Namespace.unregisterInterface(self, interface)
+
     def receivedFromClient(self, iTag, clsName, msgID, msg):
         """ Process a data message which has been received from the robot
             client and send the message to the appropriate interface.
@@ -492,10 +551,7 @@ class Robot(Namespace):
         #       connections?
         #       For now the message is just dropped, which is fatal if it is a
         #       service call, i.e. the caller will wait forever for a response
-        try:
-            self._interfaces[iTag].receive(clsName, msgID, msg)
-        except (DeadReferenceError, PBConnectionLost):
-            raise DeadConnection
+        self._dispatcher.receive(iTag, clsName, msgID, msg)
 
     def sendToClient(self, iTag, msgType, msgID, msg):
         """ Process a data message which has been received from an interface
@@ -521,7 +577,9 @@ class Robot(Namespace):
                                 instance which is interpreted as binary data.
             @type  msg:         {str : {} / base_types / StringIO} / StringIO
         """
-        if not self._connection:
+        send = self._send
+
+        if not send:
             # It is possible that the connection is already lost when a data
             # message is sent, e.g. when the client just disconnects without
             # properly removing the interfaces, then the interfaces are only
@@ -531,7 +589,7 @@ class Robot(Namespace):
             #       once reconnecting clients are available... ?
             return
 
-        self._connection.sendMessage(iTag, msgType, msgID, msg)
+        send(iTag, msgType, msgID, msg)
 
     def sendToClientInterfaceStatusUpdate(self, iTag, status):
         """ Send a status change which should be used to start or stop the
@@ -562,6 +620,7 @@ class Robot(Namespace):
         """ # TODO: Add doc
         """
         self._connection = None
+        self._send = None
         Namespace.remote_destroy(self)
 
     def remote_destroy(self):
@@ -584,6 +643,7 @@ class RobotClient(Endpoint):
     # CONFIG
     CONNECT_TIMEOUT = 30
     RECONNECT_TIMEOUT = 10
+    DEATH_CHECK_INTERVAL = 1
 
     def __init__(self, reactor, masterIP, masterPort, commPort, extIP, extPort,
                  loader, converter):
@@ -631,8 +691,22 @@ class RobotClient(Endpoint):
         self._loader = loader
         self._converter = converter
 
-        self._connections = set()
-        self._deathCandidates = {}
+        # Connection -> deadline, where the deadline is None as long as a
+        # WebSocket protocol is registered with the connection
+        self._connections = {}
+
+        # The death candidates are checked periodically instead of scheduling
+        # a call for each of them. There is a queue for each timeout, which
+        # keeps the (deadline, connection) tuples of the queue ordered by the
+        # deadline; entries whose deadline no longer matches the one of the
+        # connection are simply skipped.
+        self._deathQueues = dict((timeout, deque()) for timeout in
+                                 (self.CONNECT_TIMEOUT,
+                                  self.RECONNECT_TIMEOUT))
+        self._deathCheck = LoopingCall(self._checkDeathCandidates)
+        self._deathCheck.clock = reactor
+        d = self._deathCheck.start(self.DEATH_CHECK_INTERVAL, now=False)
+        d.addErrback(log.err, 'Check of the death candidates failed:')
 
     @property
     def converter(self):
@@ -643,25 +717,46 @@ class RobotClient(Endpoint):
 
     def registerConnection(self, connection):
         assert connection not in self._connections
-        self._connections.add(connection)
-
-        # Add the connection also to the death candidates
-        assert connection not in self._deathCandidates
-        deathCall = self._reactor.callLater(self.CONNECT_TIMEOUT,
-                                            self._killConnection, connection)
-        self._deathCandidates[connection] = deathCall
 
+        # The connection is a death candidate until the protocol registers
+        self._addDeathCandidate(connection, self.CONNECT_TIMEOUT)
 
     def unregisterConnection(self, connection):
-        assert connection in self._connections
+        # The connection is already removed if the client is terminating
+        self._connections.pop(connection, None)
 
-        # First remove the connection from the death candidates if necessary
-        deathCall = self._deathCandidates.pop(connection, None)
-        if deathCall and deathCall.active():
-            deathCall.cancel()
+    def _addDeathCandidate(self, connection, timeout):
+        """ Internally used method to mark a connection as a death candidate
+            which is destroyed if it is still a candidate after the timeout.
 
-        # Unregister the candidates
-        self._connections.remove(connection)
+            @param connection:  Connection which should be marked.
+            @type  connection:  rce.robot.Connection
+
+            @param timeout:     Timeout in seconds; has to be one of the
+                                timeouts for which a queue exists.
+            @type  timeout:     int
+        """
+        deadline = self._reactor.seconds() + timeout
+        self._deathQueues[timeout].append((deadline, connection))
+        self._connections[connection] = deadline
+
+    def _checkDeathCandidates(self):
+        """ Internally used method to destroy all death candidates whose
+            timeout has been reached.
+        """
+        now = self._reactor.seconds()
+
+        for queue in self._deathQueues.itervalues():
+            while queue and queue[0][0] <= now:
+                deadline, connection = queue.popleft()
+
+                if self._connections.get(connection) == deadline:
+                    # A failure must not stop the LoopingCall, as otherwise
+                    # no connection would be destroyed anymore
+                    try:
+                        self._killConnection(connection)
+                    except Exception:
+                        log.err(None, 'Destroying the connection failed:')
 
     def _killConnection(self, connection):
         """ Internally used method to destroy a connection whose reconnect
@@ -670,13 +765,7 @@ class RobotClient(Endpoint):
             @param connection:  Connection which should be destroyed.
             @type  connection:  rce.robot.Connection
         """
-        assert connection in self._connections
-        assert connection in self._deathCandidates
-
-        deathCall = self._deathCandidates.pop(connection)
-        if deathCall.active():
-            deathCall.cancel()
-
+        self._connections[connection] = None
         connection.destroy()
 
     def _cbAuthenticated(self, avatar, connection):
@@ -710,7 +799,7 @@ class RobotClient(Endpoint):
         if not self._avatar:  # This is RobotEndpointAvatar and not User Avatar.
             raise ForwardingError('Avatar reference is missing.')
 
-        view = RobotView(view, connection)
+        view = RobotView(view, connection, self._reactor)
         namespace = Robot(self, connection)
         connection.registerView(view)
         connection.registerNamespace(namespace)
@@ -757,9 +846,9 @@ class RobotClient(Endpoint):
             @param protocol:    Protocol which should be registered.
             @type  protocol:    rce.comm.interfaces.IServersideProtocol
         """
-        assert connection in self._deathCandidates
+        assert self._connections[connection] is not None
         connection.registerProtocol(protocol)
-        self._deathCandidates.pop(connection).cancel()
+        self._connections[connection] = None
 
     def unregisterWebsocketProtocol(self, connection, protocol):
         """ Unregister the client protocol from a Connection object.
@@ -771,10 +860,11 @@ class RobotClient(Endpoint):
             @param protocol:    Protocol which should be unregistered.
             @type  protocol:    rce.comm.interfaces.IServersideProtocol
         """
-        assert connection not in self._deathCandidates
-        deathCall = self._reactor.callLater(self.RECONNECT_TIMEOUT,
-                                            self._killConnection, connection)
-        self._deathCandidates[connection] = deathCall
+        # The connection might already be destroyed, in which case it should
+        # not become a death candidate again
+        if connection in self._connections:
+            assert self._connections[connection] is None
+            self._addDeathCandidate(connection, self.RECONNECT_TIMEOUT)
 
         connection.unregisterProtocol(protocol)
 
@@ -796,14 +886,14 @@ class RobotClient(Endpoint):
                                 ready to stop the reactor.
             @rtype:             twisted.internet.defer.Deferred
         """
-        for call in self._deathCandidates.itervalues():
-            call.cancel()
+        if self._deathCheck.running:
+            self._deathCheck.stop()
 
-        self._deathCandidates = {}
+        for queue in self._deathQueues.itervalues():
+            queue.clear()
 
-        for connection in self._connections.copy():
-            connection.destroy()
-        assert len(self._connections) == 0
+        while self._connections:
+            self._connections.popitem()[0].destroy()
 
         Endpoint.terminate(self)
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     rce-core/rce/slave/dispatcher.py
+#
+#     This file is part of the RoboEarth Cloud Engine framework.
+#
+#     This file was originally created for RoboEearth
+#     http://www.roboearth.org/
+#
+#     The research leading to these results has received funding from
+#     the European Union Seventh Framework Programme FP7/2007-2013 under
+#     grant agreement no248942 RoboEarth.
+#
+#     Copyright 2013 RoboEarth
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+#
+#     \author/s: Dominique Hunziker
+#
+#
+
+
+class Dispatcher(object):
+    """ Dispatcher which hands the data messages received from a client to
+        the interfaces of a namespace.
+
+        The module can be compiled with Cython (see setup.py), in which case
+        the Dispatcher becomes an extension type using the declarations of
+        dispatcher.pxd.
+    """
+    def __init__(self):
+        """ Initialize the Dispatcher.
+        """
+        self._receivers = {}
+
+    def register(self, iTag, receive):
+        """ Register the receive method of an interface.
+
+            @param iTag:        Tag which is used to identify the interface.
+            @type  iTag:        str
+
+            @param receive:     Method which is called with the arguments
+                                clsName, msgID, and msg for each message which
+                                is dispatched to the interface.
+            @type  receive:     callable
+        """
+        self._receivers[iTag] = receive
+
+    def unregister(self, iTag):
+        """ Unregister the receive method of an interface.
+
+            @param iTag:        Tag which is used to identify the interface.
+            @type  iTag:        str
+        """
+        del self._receivers[iTag]
+
+    def receive(self, iTag, clsName, msgID, msg):
+        """ Dispatch a data message to the interface with the given tag.
+
+            For a description of the arguments refer to
+            rce.robot.Robot.receivedFromClient.
+        """
+        self._receivers[iTag](clsName, msgID, msg)
@@ -75,7 +75,11 @@ class Endpoint(Referenceable):
         self._namespaces = set()
 
         self._loopback = None
-        self._pendingConnections = {}
+
+        # Connection information of the pending connections; both are keyed
+        # by the connection ID
+        self._pendingKeys = {}
+        self._pendingAuths = {}
         self._protocols = set()
 
     @property
@@ -134,8 +138,9 @@ class Endpoint(Referenceable):
                                 key received from the other side.
             @type  auth:        twisted.spread.pb.RemoteReference
         """
-        assert connID not in self._pendingConnections
-        self._pendingConnections[connID] = [key, auth]
+        assert connID not in self._pendingKeys
+        self._pendingKeys[connID] = key
+        self._pendingAuths[connID] = auth
 
     def remote_connect(self, connID, addr):
         """ Connect to the endpoint with the given address using the
@@ -149,13 +154,11 @@ class Endpoint(Referenceable):
                                 It consists of an IP address and a port number.
             @type  addr:        (str, int)
         """
-        assert connID in self._pendingConnections
-
         # Retrieve the key which should be sent and replace it with None to
         # indicate that the key has already been sent
-        info = self._pendingConnections[connID]
-        key, auth = info
-        info[0] = None
+        key = self._pendingKeys[connID]
+        self._pendingKeys[connID] = None
+        auth = self._pendingAuths[connID]
 
         client = ClientCreator(self._reactor, RCEInternalProtocol, self)
         d = client.connectTCP(*addr)
@@ -187,8 +190,10 @@ class Endpoint(Referenceable):
             @return:            True if the connection should be accepted.
             @rtype:             twisted.internet.defer.Deferred
         """
+        # The connection information is only needed for a single init message
         try:
-            key, auth = self._pendingConnections[connID]
+            key = self._pendingKeys.pop(connID)
+            auth = self._pendingAuths.pop(connID)
         except KeyError:
             return fail(Failure(ConnectionError('Connection was not '
                                                 'expected.')))
@@ -238,7 +243,8 @@ class Endpoint(Referenceable):
                                 ready to stop the reactor.
             @rtype:             twisted.internet.defer.Deferred
         """
-        self._pendingConnections = {}
+        self._pendingKeys = {}
+        self._pendingAuths = {}
 
         for protocol in self._protocols.copy():
             protocol.remote_destroy()
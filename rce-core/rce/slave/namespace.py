@@ -43,6 +43,10 @@ from rce.util.error import InternalError
 class Namespace(Referenceable):
     """ Abstract base class for a Namespace in a slave process.
     """
+    # Mapping of the encoded Interface types to the Interface classes which
+    # are supported by the namespace; has to be overwritten in the subclasses
+    _MAP = {}
+
     def __init__(self, endpoint):
         """ Initialize the Namespace.
         """
@@ -50,7 +54,6 @@ class Namespace(Referenceable):
         endpoint.registerNamespace(self)
 
         self._interfaces = {}
-        self._map = {}
 
     @property
     def reactor(self):
@@ -69,10 +72,8 @@ class Namespace(Referenceable):
         self._interfaces[addr] = interface
 
     def unregisterInterface(self, interface):
-        addr = interface.addr
-
-        assert addr in self._interfaces
-        del self._interfaces[addr]
+        # The interface is already removed if the namespace is destroyed
+        self._interfaces.pop(interface.addr, None)
         self._endpoint.referenceDied('interfaceDied', interface)
 
     def remote_createInterface(self, uid, iType, msgType, addr):
@@ -101,7 +102,7 @@ class Namespace(Referenceable):
             @rtype:             rce.slave.interface.Interface
         """
         try:
-            cls = self._map[iType]
+            cls = self._MAP[iType]
         except KeyError:
             raise InternalError('Interface type is not supported by this '
                                 'namespace.')
@@ -113,10 +114,8 @@ class Namespace(Referenceable):
             of destroying all interfaces owned by this namespace as well as
             deleting all circular references.
         """
-        for interface in self._interfaces.values():
-            interface.remote_destroy()
-
-        assert len(self._interfaces) == 0
+        while self._interfaces:
+            self._interfaces.popitem()[1].remote_destroy()
 
         if self._endpoint:
             self._endpoint.unregisterNamespace(self)
@@ -221,20 +221,22 @@ class RCEInternalProtocol(Int32StringReceiver, _Protocol):
         log.msg('Protocol Error: {0}'.format(failure.getErrorMessage()))
         self.transport.loseConnection()
 
-    def _messageReceived(self, msg):
+    def _messageReceived(self, msg, _UUID=UUID):
         """ Internally used method process a complete string message after
             the connection has been initialized.
 
             @param msg:         Message which was received.
             @type  msg:         str
         """
+        # '_UUID' is bound as a default argument to save the global lookups
+        # for every received message
         if len(msg) < 17:
             self.transport.loseConnection()
 
         flag = msg[:1]
 
         if flag == self._TRUE:
-            destID = UUID(bytes=msg[1:17])
+            destID = _UUID(bytes=msg[1:17])
             offset = 17
         elif flag == self._FALSE:
             destID = None
@@ -244,7 +246,7 @@ class RCEInternalProtocol(Int32StringReceiver, _Protocol):
             self.transport.loseConnection()
             return
 
-        remoteID = UUID(bytes=msg[offset:offset + 16])
+        remoteID = _UUID(bytes=msg[offset:offset + 16])
         offset += 16
 
         idLen, = self._MSG_ID_STRUCT.unpack(msg[offset:offset + 1])
@@ -275,7 +277,6 @@ class RCEInternalProtocol(Int32StringReceiver, _Protocol):
         assert self._initialized
 
         uid = interface.UID.bytes
-        assert len(uid) == 16
 
         try:
             idLen = self._MSG_ID_STRUCT.pack(len(msgID))
@@ -285,7 +286,6 @@ class RCEInternalProtocol(Int32StringReceiver, _Protocol):
         if remoteID:
             flag = self._TRUE
             rmtID = remoteID.bytes
-            assert len(rmtID) == 16
         else:
             flag = self._FALSE
             rmtID = ''
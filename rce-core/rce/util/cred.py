@@ -111,6 +111,50 @@ class CredentialError(Exception):
     """
 
 
+def _cbPasswordMatch(matched, avatarId):
+    """ Internal function which is called in case the password could be
+        successfully matched.
+    """
+    if matched:
+        return avatarId
+    else:
+        return failure.Failure(error.UnauthorizedLogin())
+
+
+def _checkPassword(c, password, avatarId):
+    """ Check the password of the credentials.
+
+        The credentials of a PB login check the password synchronously,
+        therefore the result is only wrapped in a Deferred once instead of
+        going through maybeDeferred and an additional callback.
+
+        @param c:           Credentials which should be checked.
+        @type  c:           twisted.cred.credentials.IUsernameHashedPassword
+
+        @param password:    Password which is stored for the user.
+        @type  password:    str
+
+        @param avatarId:    Avatar ID which is returned if the password
+                            matches.
+        @type  avatarId:    str
+
+        @return:            Avatar ID of the user. (type: str)
+        @rtype:             twisted.internet.defer.Deferred
+    """
+    try:
+        matched = c.checkPassword(password)
+    except Exception:
+        return defer.fail()
+
+    if isinstance(matched, defer.Deferred):
+        return matched.addCallback(_cbPasswordMatch, avatarId)
+
+    if matched:
+        return defer.succeed(avatarId)
+    else:
+        return defer.fail(error.UnauthorizedLogin())
+
+
 class RCECredChecker(object):
     """The RCE file-based, text-based username/password database.
     """
@@ -178,15 +222,6 @@ class RCECredChecker(object):
             else:
                 print('Passwords do not match.')
 
-    def _cbPasswordMatch(self, matched, username):
-        """ Internal method which is called in case the password could be
-            successfully matched.
-        """
-        if matched:
-            return username
-        else:
-            return failure.Failure(error.UnauthorizedLogin())
-
     def _loadCredentials(self):
         """ Internal method to read the credentials database.
         """
@@ -254,8 +289,7 @@ class RCECredChecker(object):
         except KeyError:
             return defer.fail(error.UnauthorizedLogin())
         else:
-            return defer.maybeDeferred(c.checkPassword, passwd
-                        ).addCallback(self._cbPasswordMatch, c.username)
+            return _checkPassword(c, passwd, c.username)
 
     def setUserMode(self, username, mode):
         """ Set the mode for a user
@@ -467,14 +501,6 @@ class RCEInternalChecker(object):
         """
         self.checkUidValidity = method
 
-    def _cbPasswordMatch(self, matched, username):
-        """ Internal method in case of success
-        """
-        if matched:
-            return username
-        else:
-            return failure.Failure(error.UnauthorizedLogin())
-
     def requestAvatarId(self, c):
         try:
             if c.username in ('container', 'robot'):
@@ -494,6 +520,5 @@ class RCEInternalChecker(object):
         except KeyError:
             return defer.fail(error.UnauthorizedLogin())
         else:
-            return defer.maybeDeferred(c.checkPassword, p
-                        ).addCallback(self._cbPasswordMatch, user)
+            return _checkPassword(c, p, user)
 
@@ -32,6 +32,8 @@
 
 from setuptools import setup
 
+from rce.util.build import getExtensions, OptionalBuildExt
+
 LONG_DESCRIPTION = """ TODO """
 
 setup(
@@ -54,4 +56,6 @@ setup(
              'scripts/rce-robot', 'scripts/rce-environment',
              'scripts/rce-rosproxy', 'scripts/rce-maintain'],
     package_data={'rce.core': ['data/*.upstart', 'data/*.script']},
+    ext_modules=getExtensions('rce/slave/dispatcher.py'),
+    cmdclass={'build_ext': OptionalBuildExt}
 )
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     rce-util/rce/util/build.py
+#
+#     This file is part of the RoboEarth Cloud Engine framework.
+#
+#     This file was originally created for RoboEearth
+#     http://www.roboearth.org/
+#
+#     The research leading to these results has received funding from
+#     the European Union Seventh Framework Programme FP7/2007-2013 under
+#     grant agreement no248942 RoboEarth.
+#
+#     Copyright 2013 RoboEarth
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+#
+#     \author/s: Dominique Hunziker
+#
+#
+
+# Python specific imports
+from distutils.errors import CCompilerError, DistutilsExecError, \
+    DistutilsPlatformError
+
+# setuptools specific imports
+from setuptools.command.build_ext import build_ext
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+
+_BUILD_ERRORS = (CCompilerError, DistutilsExecError, DistutilsPlatformError)
+
+
+def getExtensions(*modules):
+    """ Get the extension modules which are built from the given pure Python
+        modules with Cython.
+
+        @param modules:         Paths of the modules which should be compiled.
+        @type  modules:         str
+
+        @return:                List of the extension modules, which is empty
+                                if Cython is not installed.
+        @rtype:                 [ distutils.extension.Extension ]
+    """
+    if cythonize is None:
+        # Cython is optional; without it the pure Python modules are used
+        return []
+
+    return cythonize(list(modules), compiler_directives={'language_level': 2})
+
+
+class OptionalBuildExt(build_ext):
+    """ Command to build the extension modules which continues with the pure
+        Python modules if an extension module can not be compiled.
+    """
+    def initialize_options(self):
+        build_ext.initialize_options(self)
+
+        # Extension modules which could not be built
+        self._failed = []
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except DistutilsPlatformError as e:
+            self._skip('extension modules', e)
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except _BUILD_ERRORS as e:
+            self._failed.append(ext)
+            self._skip(ext.name, e)
+
+    def copy_extensions_to_source(self):
+        # Used for in-place builds; there is nothing to copy for the extension
+        # modules which could not be built
+        self.extensions = [ext for ext in self.extensions
+                           if ext not in self._failed]
+        build_ext.copy_extensions_to_source(self)
+
+    def _skip(self, name, e):
+        """ Internally used method to report an extension module which could
+            not be built.
+        """
+        print('Building {0} failed, the pure Python module is used '
+              'instead: {1}'.format(name, e))